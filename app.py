@@ -1,14 +1,24 @@
-import base64
+from __future__ import annotations
+
 import os
 import csv
 import datetime
+import hashlib
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
 import streamlit as st
-from openai import OpenAI
-from openai import OpenAIError
-from bs4 import BeautifulSoup
+
+# openai (inkl. httpx/pydantic) und selectolax werden erst bei Bedarf importiert,
+# damit der erste Seitenaufbau nicht auf diese Importketten wartet.
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 st.set_page_config(
     page_title="Daaniyal Khan Executive Career Bot",
@@ -17,8 +27,7 @@ st.set_page_config(
 )
 
 # ---------- Styling ----------
-st.markdown(
-    """
+CSS = """
     <style>
         .stApp { background-color: #1E1E1E; color: #EDEDED; }
         [data-testid="stSidebar"] { background-color: #171717; border-right: 1px solid #2f2f2f; }
@@ -28,9 +37,24 @@ st.markdown(
         .profile-wrap img { width: 140px; height: 140px; border-radius: 50%; object-fit: cover; border: 3px solid #C5A065; display: block; margin-left: auto; margin-right: auto; }
         .small-note { color: #BFBFBF; font-size: 0.9rem; }
     </style>
-    """,
-    unsafe_allow_html=True,
-)
+"""
+GOLD_DIVIDER = '<div class="gold-divider"></div>'
+
+def _inject_css() -> None:
+    st.markdown(CSS, unsafe_allow_html=True)
+
+# Profil und Kontakt in einem Markdown-Block, damit die Sidebar nur ein Element sendet.
+SIDEBAR_TEMPLATE = """## Executive Profile
+
+<div class="profile-wrap"><img src="{img}" alt="Daaniyal Khan" /></div>
+
+### Contact
+- **LinkedIn:** [Daaniyal Khan](https://www.linkedin.com/in/daaniyal-khan)
+- **Email:** [daaniyalkh@gmail.com](mailto:daaniyalkh@gmail.com)
+- **Webseite:** [www.daaniyalkhan.com](https://www.daaniyalkhan.com)
+
+---
+"""
 
 SYSTEM_PROMPT_FALLBACK = """Du bist Daaniyal Khans Chief of Staff und sprichst mit Recruitern und C-Level.
 Sprache: Antworte IMMER auf Deutsch (Sie-Form), auch wenn die Frage auf Englisch kommt.
@@ -47,97 +71,361 @@ SUGGESTED_QUESTIONS = [
 ]
 
 CV_FILENAME = "Daaniyal Khan Premium CV.html"
+PROFILE_IMAGE_NAMES = ("profile.jpg", "profile.jpeg", "profile.png")  # in dieser Priorität
 LOG_FILENAME = "chat_logs.csv"
+LOG_FLUSH_INTERVAL = 0.5  # Sekunden, in denen der Log-Thread Zeilen sammelt
+LOG_BATCH_SIZE = 8
+LOG_BUFFER_SIZE = 64 * 1024
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+SEMANTIC_THRESHOLD = 0.93
+SEMANTIC_MAX_ENTRIES = 512  # pro System-Prompt-Hash
+
+CV_VECTORS_FILENAME = "cv_vecs.npy"
+CV_CHUNKS_FILENAME = "cv_chunks.json"
+CV_CHUNK_CHARS = 1200  # ca. 300 Tokens pro Abschnitt
+RETRIEVAL_TOP_K = 5
+
+MAX_TURNS = 8  # Nur die letzten N Frage/Antwort-Paare gehen im Wortlaut an die API.
+SUMMARY_MODEL = "gpt-4o-mini"
+STREAM_RENDER_INTERVAL = 0.05  # max. 20 Aktualisierungen pro Sekunde beim Streaming
+
+def _log_worker(log_q: queue.Queue) -> None:
+    """Schreibt gesammelte Log-Batches gebündelt in die CSV-Datei; die Datei bleibt dabei offen."""
+    f = writer = None
+    while True:
+        rows = list(log_q.get())
+        time.sleep(LOG_FLUSH_INTERVAL)
+        while True:
+            try:
+                rows.extend(log_q.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            if f is None:
+                f = open(LOG_FILENAME, "a", newline="", encoding="utf-8", buffering=LOG_BUFFER_SIZE)
+                writer = csv.writer(f)
+                if f.tell() == 0:
+                    writer.writerow(["Timestamp", "Role", "Content"])
+            writer.writerows(rows)
+            f.flush()
+        except Exception as e:
+            print(f"Logging error: {e}")
+            if f is not None:
+                try:
+                    f.close()
+                except OSError:
+                    pass
+            f = None
+
+@st.cache_resource
+def _log_queue() -> queue.Queue:
+    """Eine Queue und ein Schreib-Thread pro Prozess, geteilt von allen Sitzungen."""
+    log_q = queue.Queue()
+    threading.Thread(target=_log_worker, args=(log_q,), daemon=True).start()
+    return log_q
 
 def log_interaction(role, content):
-    """Speichert jede Nachricht in einer CSV-Datei."""
-    try:
-        file_exists = os.path.exists(LOG_FILENAME)
-        with open(LOG_FILENAME, "a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            if not file_exists:
-                writer.writerow(["Timestamp", "Role", "Content"])
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            writer.writerow([timestamp, role, content])
-    except Exception as e:
-        print(f"Logging error: {e}")
+    """Speichert jede Nachricht in einer CSV-Datei (pro Gesprächsrunde gebündelt über den Log-Thread)."""
+    buffer = st.session_state.setdefault("log_buffer", [])
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    buffer.append((timestamp, role, content))
+    if role == "assistant" or len(buffer) >= LOG_BATCH_SIZE:
+        _log_queue().put(buffer.copy())
+        buffer.clear()
+
+@st.cache_resource(max_entries=4)  # begrenzt: eingetippte (auch falsche) Keys erzeugen je einen Client
+def get_openai_client(api_key: str) -> OpenAI:
+    """Ein Client pro API-Key, geteilt von allen Sitzungen; HTTP/2 bündelt parallele Anfragen auf einer Verbindung."""
+    import httpx
+    from openai import OpenAI
+
+    return OpenAI(
+        api_key=api_key,
+        http_client=httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+            timeout=httpx.Timeout(60.0, connect=5.0),
+        ),
+    )
 
 def get_api_key() -> str:
-    key = st.secrets.get("OPENAI_API_KEY") 
-    if not key:
-        key = os.getenv("OPENAI_API_KEY")
+    # Nur konfigurierte Keys (Secrets/Umgebung) werden für die Sitzung gemerkt; ein eingegebener
+    # Key bleibt im Eingabefeld editierbar.
+    if st.session_state.get("api_key"):
+        return st.session_state.api_key
+    key = st.secrets.get("OPENAI_API_KEY") or os.getenv("OPENAI_API_KEY")
+    if key:
+        st.session_state.api_key = key
+        return key
+    key = st.sidebar.text_input("OpenAI API Key", type="password")
     if not key:
         st.warning("Bitte OpenAI API Key bereitstellen.")
-        key = st.sidebar.text_input("OpenAI API Key", type="password")
     return key or ""
 
-def load_cv_text() -> str:
-    if not os.path.exists(CV_FILENAME):
+@st.cache_data(show_spinner=False)
+def _cv_digest(path: str, mtime: float) -> str:
+    """Inhalts-Hash des CV; `mtime` sorgt nur dafür, dass bei Dateiänderungen neu gehasht wird."""
+    try:
+        return hashlib.blake2b(Path(path).read_bytes(), digest_size=16).hexdigest()
+    except OSError:
         return ""
+
+@st.cache_data(show_spinner=False, persist="disk")
+def load_cv_text(path: str = CV_FILENAME, digest: str = "") -> str:
+    """Liest den CV als Klartext; `digest` (Inhalts-Hash) dient nur als Cache-Schlüssel."""
+    # Außerhalb des try: eine fehlende Installation darf nicht als leerer CV gecacht werden.
+    from selectolax.lexbor import LexborHTMLParser
+
     try:
-        with open(CV_FILENAME, "r", encoding="utf-8") as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, "html.parser")
-        return soup.get_text(separator="\n").strip()
+        body = LexborHTMLParser(Path(path).read_text(encoding="utf-8")).body
+        if body is None:
+            return ""
+        text = body.text(separator="\n", strip=True)
+        return "\n".join(line for line in text.splitlines() if line.strip())
+    except FileNotFoundError:
+        return ""
     except Exception as e:
         st.error(f"Fehler beim Lesen des CV: {e}")
         return ""
 
-def get_profile_image_src() -> str:
-    for p in [Path("profile.jpg"), Path("profile.jpeg"), Path("profile.png")]:
-        if p.exists() and p.is_file():
-            b64 = base64.b64encode(p.read_bytes()).decode("utf-8")
-            ext = "jpeg" if p.suffix.lower() in [".jpg", ".jpeg"] else "png"
-            return f"data:image/{ext};base64,{b64}"
+@st.cache_resource(show_spinner=False)
+def get_system_prompt(path: str = CV_FILENAME, digest: str = "") -> str:
+    """System-Prompt inklusive CV-Kontext, einmal pro CV-Version zusammengesetzt."""
+    return build_system_prompt(load_cv_text(path, digest))
+
+def build_system_prompt(cv_context: str) -> str:
+    return f"{SYSTEM_PROMPT_FALLBACK}\n\nCONTEXT FROM CV:\n{cv_context}" if cv_context else SYSTEM_PROMPT_FALLBACK
+
+def _encode_image(path: str) -> str:
+    """Baut die Data-URL für das Profilbild."""
+    import base64
+
+    p = Path(path)
+    b64 = base64.b64encode(p.read_bytes()).decode("utf-8")
+    ext = "jpeg" if p.suffix.lower() in [".jpg", ".jpeg"] else "png"
+    return f"data:image/{ext};base64,{b64}"
+
+@st.cache_resource(show_spinner=False)
+def _profile_data_uri() -> str:
+    """Einmal pro Prozess: das Profilbild ist ein statisches Asset."""
+    try:
+        from _profile_data import PROFILE_DATA_URL  # erzeugt von prebuild.py
+        return PROFILE_DATA_URL
+    except ImportError:
+        pass
+    with os.scandir(".") as entries:
+        found = {e.name: e.path for e in entries if e.name in PROFILE_IMAGE_NAMES and e.is_file()}
+    for name in PROFILE_IMAGE_NAMES:
+        if name in found:
+            return _encode_image(found[name])
     return "https://via.placeholder.com/300x300.png?text=Daaniyal+Khan"
 
-def ask_gpt(client: OpenAI, messages: List[dict]) -> str:
-    response = client.chat.completions.create(
+def get_profile_image_src() -> str:
+    return _profile_data_uri()
+
+@st.cache_resource(show_spinner=False)
+def _sidebar_markdown() -> str:
+    return SIDEBAR_TEMPLATE.format(img=get_profile_image_src())
+
+def ask_gpt(client: OpenAI, messages: List[dict]) -> Iterator[str]:
+    stream = client.chat.completions.create(
         model="gpt-4o",
         messages=messages,
+        temperature=0.7,
+        stream=True,
+    )
+    return (chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices)
+
+def render_stream(chunks: Iterator[str]) -> str:
+    """Zeigt gestreamte Tokens an, aktualisiert die Anzeige aber höchstens alle STREAM_RENDER_INTERVAL Sekunden."""
+    placeholder = st.empty()
+    buf = []
+    last = time.monotonic()
+    for chunk in chunks:
+        buf.append(chunk)
+        now = time.monotonic()
+        if now - last > STREAM_RENDER_INTERVAL:
+            placeholder.markdown("".join(buf))
+            last = now
+    text = "".join(buf)
+    placeholder.markdown(text)
+    return text
+
+@st.cache_data(ttl=86400, max_entries=512, show_spinner=False)
+def cached_chat(prompt_key: str, system_hash: str, _client: OpenAI, _system_prompt: str) -> str:
+    """Nicht-gestreamte Antwort auf eine kontextfreie Frage, gecacht pro (Frage, System-Prompt-Hash)."""
+    response = _client.chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": _system_prompt},
+            {"role": "user", "content": prompt_key},
+        ],
         temperature=0.7
     )
     return response.choices[0].message.content
 
+@st.cache_data(max_entries=1024, show_spinner=False)
+def _embed(text_hash: str, _client: OpenAI, _text: str) -> List[float]:
+    return _client.embeddings.create(model=EMBEDDING_MODEL, input=_text).data[0].embedding
+
+def embed_text(client: OpenAI, text: str) -> List[float]:
+    return _embed(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], client, text)
+
+def _cosine_scores(vecs: np.ndarray, query: List[float]) -> np.ndarray:
+    q = np.asarray(query, dtype=np.float32)
+    return vecs @ q / (np.linalg.norm(vecs, axis=1) * np.linalg.norm(q))
+
+@st.cache_resource
+def _semantic_store() -> Dict[str, Tuple[np.ndarray, List[str]]]:
+    """Prozessweiter Speicher pro System-Prompt-Hash: gestapelte Embeddings und zugehörige Antworten."""
+    return {}
+
+def semantic_lookup(system_hash: str, embedding: List[float]) -> Optional[str]:
+    entry = _semantic_store().get(system_hash)
+    if entry is None:
+        return None
+    vecs, answers = entry
+    scores = _cosine_scores(vecs, embedding)
+    best = int(np.argmax(scores))
+    return answers[best] if scores[best] >= SEMANTIC_THRESHOLD else None
+
+def semantic_remember(system_hash: str, embedding: List[float], answer: str) -> None:
+    store = _semantic_store()
+    vec = np.asarray(embedding, dtype=np.float32)[np.newaxis, :]
+    if system_hash in store:
+        vecs, answers = store[system_hash]
+        vec, answers = np.vstack([vecs, vec]), [*answers, answer]
+    else:
+        answers = [answer]
+    # Neues Tupel statt In-place-Änderung, damit parallele Lookups immer ein konsistentes Paar sehen.
+    store[system_hash] = (vec[-SEMANTIC_MAX_ENTRIES:], answers[-SEMANTIC_MAX_ENTRIES:])
+
+def split_cv(cv_text: str) -> List[str]:
+    """Fasst CV-Zeilen zu Abschnitten von höchstens CV_CHUNK_CHARS Zeichen zusammen."""
+    chunks, current = [], ""
+    for line in cv_text.splitlines():
+        if current and len(current) + len(line) + 1 > CV_CHUNK_CHARS:
+            chunks.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
+
+@st.cache_resource(show_spinner=False)
+def load_cv_index(_client: OpenAI, digest: str) -> Tuple[List[str], np.ndarray]:
+    """CV-Abschnitte und ihre Embeddings; von der Platte, sonst in einem Batch-Aufruf erzeugt."""
+    try:
+        with open(CV_CHUNKS_FILENAME, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        if stored["digest"] == digest:
+            return stored["chunks"], np.load(CV_VECTORS_FILENAME)
+    except (OSError, ValueError, KeyError):
+        pass
+
+    chunks = split_cv(load_cv_text(CV_FILENAME, digest))
+    if not chunks:
+        return [], np.empty((0, 0), dtype=np.float32)
+    response = _client.embeddings.create(model=EMBEDDING_MODEL, input=chunks)
+    vecs = np.array([d.embedding for d in response.data], dtype=np.float32)
+    try:
+        np.save(CV_VECTORS_FILENAME, vecs)
+        with open(CV_CHUNKS_FILENAME, "w", encoding="utf-8") as f:
+            json.dump({"digest": digest, "chunks": chunks}, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"CV index error: {e}")
+    return chunks, vecs
+
+def get_rag_prompt(client: OpenAI, cv_digest: str, query_embedding: List[float]) -> str:
+    """System-Prompt mit den RETRIEVAL_TOP_K passendsten CV-Abschnitten; leer, wenn ohnehin alles passt."""
+    if not cv_digest:
+        return ""
+    chunks, vecs = load_cv_index(client, cv_digest)
+    if len(chunks) <= RETRIEVAL_TOP_K:
+        return ""
+    scores = _cosine_scores(vecs, query_embedding)
+    top = sorted(np.argsort(scores)[::-1][:RETRIEVAL_TOP_K])
+    return build_system_prompt("\n\n".join(chunks[i] for i in top))
+
+def summarize_history(client: OpenAI, previous_summary: str, messages: List[dict]) -> str:
+    """Verdichtet ältere Gesprächsrunden (plus bisherige Zusammenfassung) mit einem günstigen Modell."""
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    if previous_summary:
+        transcript = f"Bisherige Zusammenfassung:\n{previous_summary}\n\n{transcript}"
+    response = client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=[
+            {"role": "system", "content": "Fasse den Gesprächsverlauf in wenigen Sätzen auf Deutsch zusammen. Behalte Fragen, Namen und genannte Fakten."},
+            {"role": "user", "content": transcript},
+        ],
+        temperature=0
+    )
+    return response.choices[0].message.content
+
+@st.cache_resource
+def _executor() -> ThreadPoolExecutor:
+    """Prozessweiter Pool für OpenAI-Aufrufe, die parallel zur Antwortvorbereitung laufen können."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="openai")
+
+def start_history_summary(client: OpenAI) -> Optional[Future]:
+    """Startet die Zusammenfassung des ältesten Blocks im Hintergrund, sobald das Fenster überläuft."""
+    if st.session_state.get("summary_failed"):
+        return None
+    messages = st.session_state.messages
+    # Index 0 ist die feste Begrüßung; danach folgen Frage/Antwort-Paare, die Blöcke bleiben daher paarweise.
+    covered = st.session_state.get("summary_covered", 1)
+    if len(messages) - covered <= MAX_TURNS * 2:
+        return None
+    return _executor().submit(
+        summarize_history, client, st.session_state.get("history_summary", ""), messages[covered:covered + MAX_TURNS]
+    )
+
+def windowed_history(summary_future: Optional[Future]) -> List[dict]:
+    """Höchstens MAX_TURNS Runden im Wortlaut; ältere Runden werden blockweise zusammengefasst."""
+    from openai import OpenAIError
+
+    if summary_future is not None:
+        try:
+            st.session_state.history_summary = summary_future.result()
+            st.session_state.summary_covered = st.session_state.get("summary_covered", 1) + MAX_TURNS
+        except OpenAIError as e:
+            # Die Zusammenfassung ist optional; schlägt sie fehl, bleibt es für die Sitzung beim reinen Fenster.
+            print(f"History summary error: {e}")
+            st.session_state.summary_failed = True
+
+    recent = st.session_state.messages[st.session_state.get("summary_covered", 1):][-MAX_TURNS * 2:]
+    summary = st.session_state.get("history_summary")
+    if summary:
+        return [{"role": "system", "content": f"Zusammenfassung des bisherigen Gesprächs:\n{summary}"}, *recent]
+    return recent
+
+@st.cache_resource(ttl=30, show_spinner=False)
+def _read_log_bytes(mtime: float) -> bytes:
+    """Log-Datei für den Download; `mtime` dient nur als Cache-Schlüssel."""
+    with open(LOG_FILENAME, "rb") as f:
+        return f.read()
+
 def render_sidebar() -> None:
-    st.sidebar.markdown("## Executive Profile")
-    st.sidebar.markdown(f'<div class="profile-wrap"><img src="{get_profile_image_src()}" alt="Daaniyal Khan" /></div>', unsafe_allow_html=True)
-    st.sidebar.markdown("### Contact")
-    st.sidebar.markdown("- **LinkedIn:** [Daaniyal Khan](https://www.linkedin.com/in/daaniyal-khan)")
-    st.sidebar.markdown("- **Email:** [daaniyalkh@gmail.com](mailto:daaniyalkh@gmail.com)")
-    st.sidebar.markdown("- **Webseite:** [www.daaniyalkhan.com](https://www.daaniyalkhan.com)")
-    
-    st.sidebar.markdown("---")
+    st.sidebar.markdown(_sidebar_markdown(), unsafe_allow_html=True)
     with st.sidebar.expander("Admin Access"):
         password = st.text_input("Password", type="password")
         if password == st.secrets.get("ADMIN_PASSWORD", "admin123"):
-            if os.path.exists(LOG_FILENAME):
-                with open(LOG_FILENAME, "rb") as f:
-                    st.download_button("Download Logs", f, "chat_logs.csv", "text/csv")
-            else:
+            try:
+                log_mtime = os.path.getmtime(LOG_FILENAME)
+            except OSError:
                 st.write("No logs yet.")
+            else:
+                st.download_button("Download Logs", _read_log_bytes(log_mtime), "chat_logs.csv", "text/csv")
 
-def main() -> None:
-    render_sidebar()
-    st.title("Daaniyal Khan – Strategic Leader & Director | AI & Digital Distribution")
-    st.markdown('<div class="gold-divider"></div>', unsafe_allow_html=True)
-
-    api_key = get_api_key()
-    if not api_key: st.stop()
-
-    client = OpenAI(api_key=api_key)
-    cv_context = load_cv_text()
-    
-    full_system_prompt = f"{SYSTEM_PROMPT_FALLBACK}\n\nCONTEXT FROM CV:\n{cv_context}" if cv_context else SYSTEM_PROMPT_FALLBACK
-
-    if "messages" not in st.session_state:
-        st.session_state.messages = [{
-            "role": "assistant", 
-            "content": "Hallo. Ich bin Daaniyal Khans KI-Assistent. Fragen Sie mich gerne zu seiner Führungserfahrung, Transformationsprojekten oder dem strategischen Fit."
-        }]
+def _queue_chat_input() -> None:
+    st.session_state.pending_prompt = st.session_state.chat_input
 
-    if cv_context: st.caption("✅ RAG aktiv: CV geladen.")
-    else: st.caption(f"⚠️ RAG inaktiv: Datei `{CV_FILENAME}` nicht gefunden.")
+@st.fragment
+def chat_panel(client: OpenAI, cv_digest: str, full_system_prompt: str, system_hash: str) -> None:
+    """Vorschläge, Verlauf und Antwort; läuft als Fragment, damit Interaktionen hier nicht die ganze Seite neu ausführen."""
+    from openai import OpenAIError
 
     cols = st.columns(3)
     for idx, q in enumerate(SUGGESTED_QUESTIONS):
@@ -146,8 +434,7 @@ def main() -> None:
     for msg in st.session_state.messages:
         with st.chat_message(msg["role"]): st.markdown(msg["content"])
 
-    prompt = st.chat_input("Stellen Sie Ihre Frage zu Daaniyal...")
-    if st.session_state.get("pending_prompt") and not prompt: prompt = st.session_state.pop("pending_prompt")
+    prompt = st.session_state.pop("pending_prompt", None)
 
     if prompt:
         st.session_state.messages.append({"role": "user", "content": prompt})
@@ -157,21 +444,78 @@ def main() -> None:
             st.markdown(prompt)
 
         with st.chat_message("assistant"):
-            with st.spinner("Antwort wird generiert..."):
-                response_text = ""
+            response_text = ""
+            try:
+                # Antworten ohne Gesprächsverlauf sind wiederverwendbar: die Vorschlagsfragen
+                # exakt, die erste freie Frage einer Sitzung auch in Paraphrasen.
+                standalone = not any(m["role"] == "user" for m in st.session_state.messages[:-1])
+                # Die Zusammenfassung braucht weder Embedding noch Retrieval und läuft parallel dazu;
+                # sie wird nur für gestreamte Antworten gebraucht (Vorschlagsfragen kommen aus dem Cache).
+                summary_future = None if prompt in SUGGESTED_QUESTIONS else start_history_summary(client)
+                # Retrieval und Paraphrasen-Cache sind nur Optimierungen: fällt der Embedding-Endpunkt aus,
+                # wird mit dem vollen CV-Prompt und ohne Cache geantwortet.
                 try:
-                    msgs = [{"role": "system", "content": full_system_prompt}] + \
-                           [{"role": m["role"], "content": m["content"]} for m in st.session_state.messages]
-                    
-                    response_text = ask_gpt(client, msgs)
-                    log_interaction("assistant", response_text)
-                    
-                except OpenAIError as exc:
-                    response_text = f"API Error: {exc}"
-            
-            st.markdown(response_text)
+                    embedding = embed_text(client, prompt)
+                    system_prompt = get_rag_prompt(client, cv_digest, embedding) or full_system_prompt
+                except OpenAIError as e:
+                    print(f"Retrieval error: {e}")
+                    embedding, system_prompt = None, full_system_prompt
+                if prompt in SUGGESTED_QUESTIONS:
+                    with st.spinner("Antwort wird generiert..."):
+                        response_text = cached_chat(prompt, system_hash, client, system_prompt)
+                elif standalone and embedding is not None:
+                    response_text = semantic_lookup(system_hash, embedding) or ""
+
+                if response_text:
+                    st.markdown(response_text)
+                else:
+                    msgs = [{"role": "system", "content": system_prompt}, *windowed_history(summary_future)]
+
+                    with st.spinner("Antwort wird generiert..."):
+                        stream = ask_gpt(client, msgs)
+                    response_text = render_stream(stream)
+                    if standalone and embedding is not None:
+                        semantic_remember(system_hash, embedding, response_text)
+                log_interaction("assistant", response_text)
+
+            except OpenAIError as exc:
+                response_text = f"API Error: {exc}"
+                st.markdown(response_text)
+                # Schließt die Runde im Log ab, damit die Frage nicht im Sitzungspuffer hängen bleibt.
+                log_interaction("assistant", response_text)
         
         st.session_state.messages.append({"role": "assistant", "content": response_text})
 
+def main() -> None:
+    _inject_css()
+    render_sidebar()
+    st.title("Daaniyal Khan – Strategic Leader & Director | AI & Digital Distribution")
+    st.markdown(GOLD_DIVIDER, unsafe_allow_html=True)
+
+    api_key = get_api_key()
+    if not api_key: st.stop()
+
+    client = get_openai_client(api_key)
+    try:
+        cv_mtime = os.path.getmtime(CV_FILENAME)
+    except OSError:
+        cv_mtime = 0.0
+    cv_digest = _cv_digest(CV_FILENAME, cv_mtime)
+    cv_context = load_cv_text(CV_FILENAME, cv_digest)
+    full_system_prompt = get_system_prompt(CV_FILENAME, cv_digest)
+    system_hash = hashlib.sha256(full_system_prompt.encode("utf-8")).hexdigest()[:16]
+
+    if "messages" not in st.session_state:
+        st.session_state.messages = [{
+            "role": "assistant", 
+            "content": "Hallo. Ich bin Daaniyal Khans KI-Assistent. Fragen Sie mich gerne zu seiner Führungserfahrung, Transformationsprojekten oder dem strategischen Fit."
+        }]
+
+    if cv_context: st.caption("✅ RAG aktiv: CV geladen.")
+    else: st.caption(f"⚠️ RAG inaktiv: Datei `{CV_FILENAME}` nicht gefunden.")
+
+    chat_panel(client, cv_digest, full_system_prompt, system_hash)
+    st.chat_input("Stellen Sie Ihre Frage zu Daaniyal...", key="chat_input", on_submit=_queue_chat_input)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,26 @@
+"""Kodiert das Profilbild einmalig als Data-URL in `_profile_data.py`.
+
+Aufruf beim Build/Deploy: `python prebuild.py`. Ohne Profilbild wird nichts erzeugt
+und die App fällt auf die Laufzeit-Kodierung bzw. den Platzhalter zurück.
+"""
+import base64
+from pathlib import Path
+
+CANDIDATES = ["profile.jpg", "profile.jpeg", "profile.png"]
+OUTPUT = Path("_profile_data.py")
+
+
+def main() -> None:
+    for name in CANDIDATES:
+        p = Path(name)
+        if p.is_file():
+            b64 = base64.b64encode(p.read_bytes()).decode("utf-8")
+            ext = "jpeg" if p.suffix.lower() in [".jpg", ".jpeg"] else "png"
+            OUTPUT.write_text(f'PROFILE_DATA_URL = "data:image/{ext};base64,{b64}"\n', encoding="utf-8")
+            print(f"{OUTPUT} aus {p} erzeugt.")
+            return
+    print("Kein Profilbild gefunden, nichts zu tun.")
+
+
+if __name__ == "__main__":
+    main()